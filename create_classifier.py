@@ -1,5 +1,3 @@
-import torch
-import pandas as pd
 import numpy as np
 import os
 
@@ -18,6 +16,7 @@ def trim_dataset(data_path):
     save_path = save_folder / 'trimmed_game_data.csv'
 
     # Open up the data
+    import pandas as pd # imported here, as it is slow to import
     full_data = pd.read_csv(data_path)
 
     # Extract relevant columns
@@ -58,6 +57,7 @@ class ChessDB():
         if mode == 'trim':
             self.data = self.open_and_format(data_path)
         elif mode == 'open':
+            import pandas as pd # imported here, as it is slow to import
             self.data = pd.read_csv(data_path)
 
     def open_and_format(self, data_path):
@@ -73,6 +73,7 @@ class ChessDB():
         save_path = save_folder / 'trimmed_game_data.csv'
 
         # Open up the data
+        import pandas as pd # imported here, as it is slow to import
         data = pd.read_csv(data_path)
 
         # Extract relevant columns
@@ -139,4 +140,5 @@ class ChessDB():
 
 if __name__ == '__main__':
     # Uncomment if data has not yet been trimmed
-    #format_dataset(Path(os.getcwd()) / 'data' / '...')
\ No newline at end of file
+    #format_dataset(Path(os.getcwd()) / 'data' / '...')
+    pass
\ No newline at end of file
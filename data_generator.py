@@ -1,11 +1,10 @@
 import chess
 import my_chess
-import torch
 import random
 import numpy as np
 
 import variables
-import model_builder
+import features
 
 from operator import add, ge, le
 
@@ -283,7 +282,123 @@ class ChessPlayer2():
         self.game.current_position.push(path[1]) # Remembering the first element of path is 'Start'
 
         return path, evaluation
-    
+
+class ChessGameV3():
+    """
+    Selective search using the pruning rules from ideas.md. At each node, all children are scored in a single batched
+    model call, then only the most promising children are searched further.
+
+    attr:
+        current_position: A chess.Board instance that contains the current position of the game. Is also used to find all possible moves
+        moves_tree: A MoveTree() instance that contains all of the possible moves up to a certain depth.
+        beam_width: the number of children (the top n) searched further at each node. None to keep all children
+        tol: children with evaluation worse than prev_eval - tol (from the mover's point of view) are discarded. None to disable
+        nodes_evaluated: the number of positions scored by the model in the last search
+        batch_buffer: preallocated float32 array the children of each node are encoded into before scoring
+    """
+    def __init__(self, beam_width=None, tol=None):
+        self.current_position = my_chess.TensorBoard() # initialise with default position
+        self.moves_tree = MoveTree('Start') # Just a placeholder
+        self.beam_width = beam_width
+        self.tol = tol
+        self.nodes_evaluated = 0
+        self.batch_buffer = np.empty((256, features.ARRAY_LENGTH), dtype=np.float32) # no position has more than 218 legal moves
+
+    def score_boards(self, model, boards):
+        """
+        Scores boards with one batched model call. Every position in a search is scored through here, so they all share
+        the same encoding and dtype.
+
+        returns:
+            evaluations: a list of floats, one per board
+        """
+        # The buffer is reused by every node, which is safe as the evaluations are read out before recursing
+        encoded = features.to_arrays(boards, out=self.batch_buffer[:len(boards)])
+        import torch # imported here, as it is slow to import
+        evaluations = model(torch.from_numpy(encoded))
+        self.nodes_evaluated += len(boards)
+
+        return [float(evaluation) for evaluation in evaluations]
+
+    def score_children(self, model):
+        """
+        Scores every legal move from the current position with one batched model call.
+
+        returns:
+            move_eval_pairs: a list of (move, evaluation) pairs
+        """
+        moves = list(self.current_position.legal_moves)
+
+        # Children are made on a plain chess.Board, which is cheaper to copy than pushing and popping the TensorBoard
+        parent = chess.Board(self.current_position.fen())
+        children = []
+        for move in moves:
+            child = parent.copy(stack=False)
+            child.push(move)
+            children.append(child)
+
+        return list(zip(moves, self.score_boards(model, children)))
+
+    def select_children(self, move_eval_pairs, colour, prev_eval):
+        """
+        Chooses which children to search further. Keeps all moves for which the eval >= prev_eval - tol (for white), or if
+        no such moves exist, just the best move. Then keeps only the top beam_width of those.
+        """
+        # Sort so that the best moves for colour come first
+        move_eval_pairs = sorted(move_eval_pairs, key=lambda x: x[1], reverse=(colour == 0))
+
+        if self.tol is not None and prev_eval is not None:
+            if colour == 0:
+                selected = [pair for pair in move_eval_pairs if pair[1] >= prev_eval - self.tol]
+            else:
+                selected = [pair for pair in move_eval_pairs if pair[1] <= prev_eval + self.tol]
+            move_eval_pairs = selected if selected else move_eval_pairs[:1]
+
+        if self.beam_width is not None:
+            move_eval_pairs = move_eval_pairs[:self.beam_width]
+
+        return move_eval_pairs
+
+    def get_best_evals(self, tree, depth, model, colour, max_min=[max, min], prev_eval=None):
+        """Scores all children of the tree at once, selects the most promising ones and searches them. Repeats until the
+        best evaluation is returned.
+
+        args:
+            tree: the current MoveTree object
+            depth: the depth of the current tree
+            model: the model used to evaluate the moves. Must accept a batch of boards (one per row)
+            colour: the team of the model - 0 for white, 1 for black
+            max_min: a list containing the two functions (max and min) used to choose an evaluated move for white and black respectively.
+            prev_eval: the evaluation of the current position. None at the root, where the tolerance cutoff is not applied
+        """
+        if tree.parent is None: # i.e a new search is starting
+            tree.next_moves = [] # clear out the previous search
+            self.nodes_evaluated = 0
+
+        # If the tree is a leaf, there are no children to score
+        if not bool(self.current_position.legal_moves):
+            evaluation = prev_eval if prev_eval is not None else self.score_boards(model, [self.current_position])[0]
+            return [(tree.path, evaluation)]
+
+        path_eval_pairs = []
+        for move, evaluation in self.select_children(self.score_children(model), colour, prev_eval):
+            tree.add_node(move)
+            child_tree = tree.next_moves[-1]
+
+            if depth - 0.5 > 0:
+                self.current_position.push(move) # make the move
+                # (1 - colour) as the next move will be the other colour's turn
+                path_eval_pairs += self.get_best_evals(child_tree, depth - 0.5, model, 1 - colour, max_min, prev_eval=evaluation)
+                self.current_position.pop() # unmake the move
+            else: # i.e at the final depth, the batched score is the evaluation
+                path_eval_pairs.append((child_tree.path, evaluation))
+
+        ### Now choose (all of) the best pairs
+        max_min_eval = max_min[colour](path_eval_pairs, key=lambda x: x[1])[1]
+        best_pairs = [pair for pair in path_eval_pairs if pair[1] == max_min_eval]
+
+        return best_pairs
+
 # Generates games given two models
 
 def play_game(model, base_model, depth):
@@ -315,6 +430,41 @@ def play_game(model, base_model, depth):
         # Print the moves
         print(f'{i+1}. {white_path[1]} ({white_eval})  {black_path[1]} ({black_eval})')
 
+def play_full_game(white_model, black_model, depth, opening=(), max_plies=400):
+    """
+    Plays a complete game between the two models and returns the result rather than printing it.
+
+    args:
+        white_model: controls white
+        black_model: controls black
+        depth: how far the models search to evaluate positions
+        opening: a sequence of moves in uci format (e.g ['e2e4', 'e7e5']) played before the models take over
+        max_plies: the game is adjudicated as a draw if it is not finished after this many plies
+    returns:
+        result: '1-0', '0-1' or '1/2-1/2'
+        game_moves: a list of all moves played in uci format, including the opening
+    """
+    # Setup game board
+    game = ChessGame()
+
+    # Play the opening
+    for move in opening:
+        game.current_position.push(chess.Move.from_uci(move))
+
+    # Setup players
+    players = [ChessPlayer(white_model, 0, game),
+               ChessPlayer(black_model, 1, game)]
+
+    while not game.current_position.is_game_over(claim_draw=True) and game.current_position.ply() < max_plies:
+        # The player whose turn it is makes a move. chess.Board.turn is True for white
+        players[1 - game.current_position.turn].choose_move(depth=depth)
+
+    result = game.current_position.result(claim_draw=True)
+    if result == '*': # i.e the game was cut off at max_plies
+        result = '1/2-1/2'
+
+    return result, [move.uci() for move in game.current_position.move_stack]
+
 def play_against_model(model, depth):
     """
     Play a game against a model.
@@ -345,6 +495,7 @@ def play_against_model(model, depth):
         print(f'{i+1}. {white_path[1]} ({white_eval}) {move}')
 
 if __name__ == '__main__':
+    import model_builder # imported here, as it is slow to import
 
     base_model = model_builder.BaseModel(variables.material_values)
 
@@ -0,0 +1,125 @@
+"""
+Batched feature encoders. Each function takes either a sequence of chess.Board (or TensorBoard) instances, or an (N, 66)
+array of positions in the TensorBoard.as_array format, and converts them all at once into one of three layouts:
+
+    arrays:    (N, 66) - squares 0-63 hold the signed piece codes from variables.py, index 64 the turn (white=1)
+               and index 65 the en-passant square (-1 if none). The same layout as TensorBoard.as_array.
+    planes:    (N, 12, 64) - one-hot piece planes, in the order of variables.piece_types
+    bitboards: (N, 12) uint64 - the planes packed into one integer per piece type, bit i set for square i
+
+All functions accept an 'out' array to write into, so buffers can be allocated once and reused (e.g by a DataLoader).
+The only Python-level work is reading each board's bitboards. Everything after that is vectorised.
+"""
+
+import numpy as np
+
+import variables
+
+# Signed piece code of each plane, e.g white pawn = 1, black pawn = -1
+PLANE_CODES = np.array([piece * multiplier for piece, colour, multiplier in variables.piece_types], dtype=np.int8)
+
+ARRAY_LENGTH = len(variables.base_board)
+
+def boards_to_bitboards(boards, out=None):
+    """
+    Reads the 12 piece bitboards, turn and en-passant square of each board.
+
+    returns:
+        bitboards: (N, 12) uint64 array
+        turns: (N,) array, 1 for white to move and 0 for black
+        ep_squares: (N,) array of en-passant squares, -1 if none
+    """
+    masks = [board.pieces_mask(piece, colour) for board in boards for piece, colour, _ in variables.piece_types]
+    if out is None:
+        out = np.empty((len(boards), len(PLANE_CODES)), dtype=np.uint64)
+    out[...] = np.array(masks, dtype=np.uint64).reshape(len(boards), len(PLANE_CODES))
+
+    turns = np.fromiter((board.turn for board in boards), dtype=np.int8, count=len(boards))
+    ep_squares = np.fromiter((-1 if board.ep_square is None else board.ep_square for board in boards),
+                             dtype=np.int8, count=len(boards))
+
+    return out, turns, ep_squares
+
+def unpack_bitboards(bitboards, out=None, dtype=np.float32):
+    """Converts (N, 12) uint64 bitboards into (N, 12, 64) one-hot planes"""
+    # View each little-endian uint64 as 8 bytes, so that unpacking the bits gives square 0 first
+    bits = np.unpackbits(np.ascontiguousarray(bitboards, dtype='<u8').view(np.uint8), axis=-1, bitorder='little')
+    if out is None:
+        out = np.empty(bitboards.shape + (64,), dtype=dtype)
+    out[...] = bits.reshape(bitboards.shape + (64,))
+
+    return out
+
+def pack_planes(planes, out=None):
+    """Converts (N, 12, 64) one-hot planes into (N, 12) uint64 bitboards"""
+    packed = np.packbits(planes.astype(bool), axis=-1, bitorder='little') # (N, 12, 8) bytes
+    if out is None:
+        out = np.empty(planes.shape[:-1], dtype=np.uint64)
+    out[...] = np.ascontiguousarray(packed).view('<u8')[..., 0]
+
+    return out
+
+def planes_to_arrays(planes, turns, ep_squares, out=None, dtype=np.float32):
+    """Converts (N, 12, 64) planes plus the turn and en-passant square of each position into (N, 66) arrays"""
+    if out is None:
+        out = np.empty((planes.shape[0], ARRAY_LENGTH), dtype=dtype)
+    np.matmul(PLANE_CODES.astype(out.dtype), planes.astype(out.dtype, copy=False), out=out[:, :64])
+    out[:, 64] = turns
+    out[:, 65] = ep_squares
+
+    return out
+
+def arrays_to_planes(arrays, out=None, dtype=np.float32):
+    """Converts (N, 66) arrays into (N, 12, 64) one-hot planes. The turn and en-passant square are dropped."""
+    if out is None:
+        out = np.empty((arrays.shape[0], len(PLANE_CODES), 64), dtype=dtype)
+    out[...] = arrays[:, None, :64] == PLANE_CODES[None, :, None]
+
+    return out
+
+def to_arrays(positions, out=None, dtype=np.float32):
+    """
+    Encodes positions in the (N, 66) TensorBoard.as_array layout.
+
+    args:
+        positions: a sequence of boards, or an (N, 66) array
+        out: optional (N, 66) array to write into. Its dtype overrides dtype.
+        dtype: the dtype of the returned array when out is not given
+    """
+    if isinstance(positions, np.ndarray):
+        if out is None:
+            return positions.astype(dtype)
+        out[...] = positions
+        return out
+
+    bitboards, turns, ep_squares = boards_to_bitboards(positions)
+    return planes_to_arrays(unpack_bitboards(bitboards, dtype=np.int8), turns, ep_squares, out=out, dtype=dtype)
+
+def to_planes(positions, out=None, dtype=np.float32):
+    """
+    Encodes positions as (N, 12, 64) one-hot piece planes.
+
+    args:
+        positions: a sequence of boards, or an (N, 66) array
+        out: optional (N, 12, 64) array to write into
+        dtype: the dtype of the returned array when out is not given
+    """
+    if isinstance(positions, np.ndarray):
+        return arrays_to_planes(positions, out=out, dtype=dtype)
+
+    bitboards, _, _ = boards_to_bitboards(positions)
+    return unpack_bitboards(bitboards, out=out, dtype=dtype)
+
+def to_bitboards(positions, out=None):
+    """
+    Encodes positions as (N, 12) uint64 bitboards.
+
+    args:
+        positions: a sequence of boards, or an (N, 66) array
+        out: optional (N, 12) uint64 array to write into
+    """
+    if isinstance(positions, np.ndarray):
+        return pack_planes(arrays_to_planes(positions, dtype=bool), out=out)
+
+    bitboards, _, _ = boards_to_bitboards(positions, out=out)
+    return bitboards
@@ -4,9 +4,9 @@ import random
 import numpy as np
 
 import variables
-import data_generator
+import my_chess
 
-from numba import njit
+kernels_compiled = False # set by compile_kernels()
 
 class BaseModel(torch.nn.Module):
     """
@@ -23,12 +23,16 @@ class BaseModel(torch.nn.Module):
         #evaluation = [self.material_values[piece.item()] for piece in board[0:64]]
         #evaluation = sum(evaluation)
 
+        compile_kernels()
+
+        if board.dim() == 2: # i.e a batch of boards, one per row
+            return base_model_forward_batch(np.array(board[:, 0:64]))
+
         return base_model_forward(np.array(board[0:64]))
 
     def calc_piece_value(self, piece):
         return self.material_values[piece.item()]
 
-@njit
 def base_model_forward(board: np.array):
     """
     forward() function of base_model that can be jit compiled with Numba
@@ -54,6 +58,33 @@ def base_model_forward(board: np.array):
 
     return evaluation
 
+def base_model_forward_batch(boards: np.array):
+    """
+    Applies base_model_forward to each row of boards, so a whole batch of positions is evaluated in one call
+    """
+    evaluations = np.zeros(boards.shape[0])
+    for i in range(boards.shape[0]):
+        evaluations[i] = base_model_forward(boards[i])
+
+    return evaluations
+
+def compile_kernels():
+    """
+    Replaces base_model_forward and base_model_forward_batch with their Numba compiled versions. This is called on the
+    first forward() rather than at import, so processes that never evaluate with BaseModel don't import numba.
+    cache=True stores the compiled code on disk, so new processes load it rather than recompiling.
+    """
+    global kernels_compiled, base_model_forward, base_model_forward_batch
+    if kernels_compiled:
+        return
+
+    from numba import njit # imported here, as it is slow to import
+
+    # base_model_forward must be compiled first, as base_model_forward_batch calls it through this module's globals
+    base_model_forward = njit(cache=True)(base_model_forward)
+    base_model_forward_batch = njit(cache=True)(base_model_forward_batch)
+    kernels_compiled = True
+
 class RandomModel(torch.nn.Module):
     """
     Test model to test if a game can actually be played.
@@ -63,13 +94,15 @@ class RandomModel(torch.nn.Module):
 
     def forward(self, path):
         # Just randomly chooses a move
+        if path.dim() == 2: # i.e a batch of boards
+            return [random.randint(0, 100) for _ in range(len(path))]
         return random.randint(0, 100)
 
 if __name__ == '__main__':
     base = BaseModel(variables.material_values)
 
     test_fen = 'r2q1b1r/ppp1kppp/2np1n2/4p3/Q1P3P1/5N2/PP1PPPP1/RNB1KB1R w KQ - 1 7'
-    test_board = data_generator.TensorBoard()
+    test_board = my_chess.TensorBoard()
     test_board.set_fen(test_fen)
 
     print(base(test_board.as_tensor()))
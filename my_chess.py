@@ -1,13 +1,7 @@
 import chess
 import variables
-import torch
 import numpy as np
 
-from numba import jit, njit, int32
-from numba.experimental import jitclass
-
-import numba.np.unsafe.ndarray
-
 class stack():
     def __init__(self):
         self.values = []
@@ -40,14 +34,39 @@ class TensorBoard(chess.Board):
         self.previous_positions.push(np.copy(self.as_array)) # Put current position on the stack
         self.update_array(move) # Now update current position
 
-    def pop(self):
-        super().pop()
+    def pop(self) -> chess.Move:
+        move = super().pop()
         self.as_array = self.previous_positions.pop() # pop the previous position from the stack and update the as_array
-    
+        return move # chess.Board relies on pop returning the move (e.g when checking for repetitions)
+
+    def set_fen(self, fen: str) -> None:
+        super().set_fen(fen)
+        self.previous_positions = stack() # previous positions no longer lead to this one
+        self.as_array = np.zeros(len(variables.base_board))
+
+        # Rebuild the array from scratch, as it can't be reached by updating with moves
+        for square, piece in self.piece_map().items():
+            self.as_array[square] = piece.piece_type * (1 if piece.color == chess.WHITE else -1)
+        self.as_array[64] = 1 if self.turn == chess.WHITE else 0 # matches base_board, where white to move is 1
+        self.as_array[65] = -1 if self.ep_square is None else self.ep_square
+
     def update_array(self, move):
         # Update the array with the move
-        self.as_array[move.to_square] = self.as_array[move.from_square]
+        piece = self.as_array[move.from_square]
+        captured = self.as_array[move.to_square]
+        self.as_array[move.to_square] = piece if move.promotion is None else move.promotion * np.sign(piece)
         self.as_array[move.from_square] = 0
+
+        from_file, to_file = chess.square_file(move.from_square), chess.square_file(move.to_square)
+        # En-passant is the only time a pawn moves diagonally onto an empty square. The captured pawn is beside from_square
+        if abs(piece) == chess.PAWN and captured == 0 and from_file != to_file:
+            self.as_array[chess.square(to_file, chess.square_rank(move.from_square))] = 0
+        # Castling is the only time the king moves two files, so move the rook over as well
+        if abs(piece) == chess.KING and abs(to_file - from_file) == 2:
+            rank = chess.square_rank(move.from_square)
+            rook_from, rook_to = (chess.square(7, rank), chess.square(5, rank)) if to_file == 6 else (chess.square(0, rank), chess.square(3, rank))
+            self.as_array[rook_to] = self.as_array[rook_from]
+            self.as_array[rook_from] = 0
         
         # Check the other conditions
         self.as_array[64] = 1 - self.as_array[64] # Is now oter player's turn
@@ -87,4 +106,5 @@ class TensorBoard(chess.Board):
         return torch.tensor(board_info)
         """
     def as_tensor(self):
+        import torch # imported here, as it is slow to import
         return torch.tensor(self.as_array)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Measures how long each entry point takes to get from a fresh Python process to doing useful work. Each scenario is run
+in a new interpreter, as that is what every worker in a process pool pays before its first move.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# Code run in the fresh process for each entry point. Each one stops once the first piece of real work is done.
+scenarios = {
+    'play': """
+import uci
+import variables
+import model_builder
+engine = uci.UCIEngine(model_builder.BaseModel(variables.material_values))
+engine.minimax(engine.board, 1, -float('inf'), float('inf'), None, [])
+""",
+    'self-play worker': """
+import variables
+import model_builder
+import tournament
+base_model = model_builder.BaseModel(variables.material_values)
+tournament.play_match_game(base_model, base_model, 0.5, [], True, 1)
+""",
+    'ingestion': """
+import sys
+import create_classifier
+create_classifier.ChessDB('open', sys.argv[1])
+""",
+}
+
+def time_scenario(code, args=(), numba_cache_dir=None):
+    """
+    Runs code once in a fresh interpreter and returns the time taken in seconds.
+
+    args:
+        numba_cache_dir: where numba reads and writes its compiled kernels. None to use __pycache__ as normal
+    """
+    env = dict(os.environ)
+    if numba_cache_dir is not None:
+        env['NUMBA_CACHE_DIR'] = numba_cache_dir
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code, *args], cwd=REPO_DIR, env=env, check=True)
+    return time.perf_counter() - start
+
+def summarise(times):
+    return f'best {min(times):.2f}s / mean {sum(times) / len(times):.2f}s'
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # A tiny csv, so that the ingestion scenario measures startup rather than reading data
+        csv_path = os.path.join(tmp_dir, 'games.csv')
+        with open(csv_path, 'w') as f:
+            f.write('Event,Result,AN,WhiteElo,BlackElo\nBlitz,1-0,1. e4 e5 1-0,1500,1500\n')
+
+        for name, code in scenarios.items():
+            args = [csv_path] if name == 'ingestion' else []
+
+            # Cold: every run gets an empty numba cache, so the kernels are compiled from scratch
+            cold = [time_scenario(code, args, tempfile.mkdtemp(dir=tmp_dir)) for _ in range(repeats)]
+
+            # Warm: fill a cache once, then every run loads the kernels from it
+            warm_cache_dir = tempfile.mkdtemp(dir=tmp_dir)
+            time_scenario(code, args, warm_cache_dir)
+            warm = [time_scenario(code, args, warm_cache_dir) for _ in range(repeats)]
+
+            print(f'{name}: cold cache {summarise(cold)}, warm cache {summarise(warm)} over {repeats} runs each')
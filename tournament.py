@@ -0,0 +1,189 @@
+import os
+import math
+import variables
+import data_generator
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+class SPRT():
+    """
+    Sequential probability ratio test on the score of model_a against model_b. Uses the normal approximation to the
+    game outcome distribution (the same approximation used by fishtest), so wins, draws and losses all count.
+
+    attr:
+        elo0: the elo difference of the null hypothesis (i.e model_a is no better than this)
+        elo1: the elo difference of the alternative hypothesis (i.e model_a is at least this much better)
+        lower_bound, upper_bound: the log-likelihood ratio bounds. Crossing either one ends the test.
+        wins, draws, losses: the results so far, from model_a's point of view
+        decision: 'H1' or 'H0' once the LLR first crosses a bound, otherwise None. Results added afterwards (e.g games
+                  that were still running) don't change it.
+    """
+    def __init__(self, elo0=0, elo1=10, alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.decision = None
+
+    def update(self, score):
+        """Adds a game result. score is 1 for a model_a win, 0.5 for a draw and 0 for a loss"""
+        if score == 1:
+            self.wins += 1
+        elif score == 0.5:
+            self.draws += 1
+        else:
+            self.losses += 1
+
+        if self.decision is None:
+            self.decision = self.status()
+
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def mean_and_variance(self, pseudo_count=0):
+        """
+        Returns the mean score per game and the variance of a single game's score.
+
+        args:
+            pseudo_count: added to each of wins, draws and losses. A non-zero value keeps the variance above 0 when
+                          every game so far has had the same result.
+        """
+        wins, draws, losses = self.wins + pseudo_count, self.draws + pseudo_count, self.losses + pseudo_count
+        n = wins + draws + losses
+        mean = (wins + 0.5 * draws) / n
+        variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / n
+        return mean, variance
+
+    def llr(self):
+        """Returns the log-likelihood ratio of H1 against H0"""
+        if self.games() == 0:
+            return 0
+
+        # Half a win, draw and loss are added, otherwise a run of identical results would have zero variance and the
+        # test could never finish, however one-sided the match is
+        mean, variance = self.mean_and_variance(pseudo_count=0.5)
+
+        s0 = elo_to_score(self.elo0)
+        s1 = elo_to_score(self.elo1)
+        return self.games() * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+    def status(self):
+        """Returns 'H1' if model_a is stronger, 'H0' if it isn't, or None if the test is not yet conclusive"""
+        llr = self.llr()
+        if llr >= self.upper_bound:
+            return 'H1'
+        elif llr <= self.lower_bound:
+            return 'H0'
+        else:
+            return None
+
+    def elo(self, z=1.96):
+        """
+        Returns the estimated elo difference and its error bars.
+
+        args:
+            z: the number of standard deviations covered by the error bars. Defaults to 1.96 (i.e 95%)
+        returns:
+            elo, lower, upper: the estimate and the bounds of the confidence interval. (0, -inf, inf) if no games have
+                               been played
+        """
+        if self.games() == 0:
+            return 0, -math.inf, math.inf
+
+        # Uses the same pseudo-counts as llr(), otherwise a one-sided result has no variance and the error bars collapse
+        mean, variance = self.mean_and_variance(pseudo_count=0.5)
+        error = z * math.sqrt(variance / self.games())
+        return score_to_elo(mean), score_to_elo(mean - error), score_to_elo(mean + error)
+
+def elo_to_score(elo):
+    """Converts an elo difference into an expected score"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def score_to_elo(score):
+    """Converts an expected score into an elo difference. Scores of 0 and 1 give -inf and inf."""
+    if score <= 0:
+        return -math.inf
+    elif score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+def play_match_game(model_a, model_b, depth, opening, a_is_white, max_plies):
+    """
+    Plays one game and returns the score from model_a's point of view. Runs in a worker process.
+    """
+    if a_is_white:
+        result, _ = data_generator.play_full_game(model_a, model_b, depth, opening, max_plies)
+    else:
+        result, _ = data_generator.play_full_game(model_b, model_a, depth, opening, max_plies)
+
+    score = {'1-0': 1, '1/2-1/2': 0.5, '0-1': 0}[result]
+
+    return score if a_is_white else 1 - score
+
+def run_match(model_a, model_b, depth=1, max_games=1000, workers=None, openings=variables.openings,
+              max_plies=400, sprt=None):
+    """
+    Plays games between model_a and model_b in parallel worker processes until the SPRT is conclusive or max_games
+    have been played. Each opening is played twice, once with each model as white.
+
+    args:
+        model_a: the model being tested (e.g a new version)
+        model_b: the model being tested against (e.g BaseModel)
+        depth: how far the models search to evaluate positions
+        max_games: the maximum number of games to play if the SPRT is not conclusive
+        workers: number of worker processes. Defaults to the number of CPUs
+        openings: a list of openings (lists of uci moves) to start games from
+        max_plies: games longer than this are adjudicated as draws
+        sprt: an SPRT instance. Defaults to SPRT()
+    returns:
+        sprt: the SPRT instance containing the results. Use sprt.decision and sprt.elo() to read them.
+    """
+    sprt = SPRT() if sprt is None else sprt
+    workers = os.cpu_count() if workers is None else workers
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only keep a couple of games per worker in flight, so that stopping early doesn't leave a large backlog
+        max_in_flight = 2 * workers
+        games_submitted = 0
+        pending = set()
+
+        while True:
+            # Top up the queue of games
+            while games_submitted < max_games and len(pending) < max_in_flight:
+                opening = openings[(games_submitted // 2) % len(openings)] # each opening is used for a pair of games
+                a_is_white = games_submitted % 2 == 0 # alternate colours
+                pending.add(executor.submit(play_match_game, model_a, model_b, depth, opening, a_is_white, max_plies))
+                games_submitted += 1
+
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sprt.update(future.result())
+
+            if sprt.decision is not None:
+                # Test is conclusive, so cancel the games that have not started yet. The ones already running are
+                # waited for anyway when the executor shuts down, so count their results rather than throwing them away.
+                for future in pending:
+                    if not future.cancel():
+                        sprt.update(future.result())
+                break
+
+    return sprt
+
+if __name__ == '__main__':
+    import model_builder # imported here, as it is slow to import
+    base_model = model_builder.BaseModel(variables.material_values)
+    random_model = model_builder.RandomModel()
+
+    sprt = run_match(base_model, random_model, depth=0.5, max_games=200)
+
+    elo, lower, upper = sprt.elo()
+    print(f'Games: {sprt.games()} (+{sprt.wins} ={sprt.draws} -{sprt.losses})')
+    print(f'Elo difference: {elo:.1f} [{lower:.1f}, {upper:.1f}]')
+    print(f'LLR: {sprt.llr():.2f} [{sprt.lower_bound:.2f}, {sprt.upper_bound:.2f}] -> {sprt.decision}')
@@ -0,0 +1,313 @@
+import sys
+import time
+import chess
+import threading
+import numpy as np
+
+import my_chess
+import features
+import variables
+
+MATE_EVAL = 10000 # Larger than any evaluation the models can give
+MIN_MOVE_TIME = 0.01 # Never plan to spend less than this many seconds on a move
+
+class SearchStopped(Exception):
+    """Raised inside the search to unwind it when it has been told to stop"""
+    pass
+
+class UCIEngine():
+    """
+    Runs a model as a UCI engine. The search runs on a background thread so the engine can keep reading commands
+    (e.g 'stop') while it is thinking.
+
+    attr:
+        model: the model used to evaluate positions
+        board: a TensorBoard containing the position set by the last 'position' command
+        stop_event: set to tell the search to stop as soon as possible
+        ponderhit_event: set when the opponent plays the expected move (or the search is stopped) while pondering
+        pondering: True while searching in the opponent's time
+        infinite: True if the search must not send 'bestmove' until 'stop' is received
+        search_start: the time (from time.monotonic()) at which the current search started
+        deadline: the time (from time.monotonic()) at which the search must stop. None for no time limit
+        search_thread: the thread running the current search, or None
+        leaf_buffer: preallocated float32 array leaf positions are encoded into before scoring
+    """
+    def __init__(self, model, name='Chess_AI', output=sys.stdout):
+        self.model = model
+        self.name = name
+        self.output = output
+        self.output_lock = threading.Lock()
+
+        self.board = my_chess.TensorBoard()
+        self.stop_event = threading.Event()
+        self.ponderhit_event = threading.Event()
+        self.pondering = False
+        self.infinite = False
+        self.search_start = None
+        self.deadline = None
+        self.move_time = None
+        self.nodes = 0
+        self.search_thread = None
+        self.leaf_buffer = np.empty((1, features.ARRAY_LENGTH), dtype=np.float32)
+
+    def send(self, message):
+        with self.output_lock:
+            print(message, file=self.output, flush=True)
+
+    def loop(self, input_stream=sys.stdin):
+        """Reads commands until 'quit' is received or the input ends"""
+        for line in input_stream:
+            if not self.handle_command(line):
+                break
+        self.stop_search()
+
+    def handle_command(self, line):
+        """
+        Handles a single command. Returns False if the engine should quit.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+
+        command, args = tokens[0], tokens[1:]
+
+        if command == 'uci':
+            self.send(f'id name {self.name}')
+            self.send('id author JamesCarr1')
+            self.send('option name Ponder type check default true')
+            self.send('uciok')
+        elif command == 'isready':
+            self.send('readyok')
+        elif command == 'ucinewgame':
+            self.stop_search()
+            self.board = my_chess.TensorBoard()
+        elif command == 'position':
+            self.stop_search()
+            self.set_position(args)
+        elif command == 'go':
+            self.stop_search()
+            self.start_search(self.parse_go(args))
+        elif command == 'stop':
+            self.stop_search()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            return False
+
+        return True
+
+    def set_position(self, args):
+        """
+        Handles 'position [startpos | fen <fen>] [moves <move1> ...]'
+        """
+        board = my_chess.TensorBoard()
+
+        if 'moves' in args:
+            moves_index = args.index('moves')
+            position, moves = args[:moves_index], args[moves_index + 1:]
+        else:
+            position, moves = args, []
+
+        if position and position[0] == 'fen':
+            board.set_fen(' '.join(position[1:]))
+
+        for move in moves:
+            board.push(chess.Move.from_uci(move))
+
+        self.board = board
+
+    def parse_go(self, args):
+        """
+        Converts the arguments of a 'go' command into a dictionary, e.g ['wtime', '1000', 'ponder'] ->
+        {'wtime': 1000, 'ponder': True}
+        """
+        limits = {}
+        i = 0
+        while i < len(args):
+            if args[i] in ('ponder', 'infinite'):
+                limits[args[i]] = True
+                i += 1
+            elif args[i] in ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes'):
+                limits[args[i]] = int(args[i + 1])
+                i += 2
+            else: # ignore anything we don't support (e.g searchmoves)
+                i += 1
+
+        return limits
+
+    def allocate_time(self, limits):
+        """
+        Returns the number of seconds to spend on this move, or None if there is no time limit.
+        """
+        if 'movetime' in limits:
+            return limits['movetime'] / 1000
+
+        time_left, increment = ('wtime', 'winc') if self.board.turn == chess.WHITE else ('btime', 'binc')
+        if time_left not in limits:
+            return None
+
+        # Spread the remaining time over the rest of the game, and keep a margin so we never flag
+        moves_to_go = limits.get('movestogo', 30)
+        allocated = limits[time_left] / moves_to_go + 0.8 * limits.get(increment, 0)
+        allocated = min(allocated, limits[time_left] - 50) # always keep 50ms in hand
+
+        return max(allocated / 1000, MIN_MOVE_TIME)
+
+    def start_search(self, limits):
+        self.stop_event.clear()
+        self.ponderhit_event.clear()
+        self.pondering = limits.get('ponder', False)
+        self.infinite = limits.get('infinite', False)
+        self.search_start = time.monotonic()
+        self.nodes = 0
+
+        # The clock doesn't start until ponderhit while pondering
+        self.move_time = None if self.infinite else self.allocate_time(limits)
+        if self.pondering or self.move_time is None:
+            self.deadline = None
+        else:
+            self.deadline = self.search_start + self.move_time
+
+        self.search_thread = threading.Thread(target=self.search, args=(limits,), daemon=True)
+        self.search_thread.start()
+
+    def stop_search(self):
+        """Stops the current search (if there is one) and waits for it to report its best move"""
+        if self.search_thread is not None:
+            self.stop_event.set()
+            self.ponderhit_event.set()
+            self.search_thread.join()
+            self.search_thread = None
+
+    def ponderhit(self):
+        """The opponent played the expected move, so keep searching, but now on our own clock"""
+        if self.pondering:
+            if self.move_time is not None:
+                # Time already spent pondering counts towards this move, which is what makes pondering save time
+                self.deadline = max(self.search_start + self.move_time, time.monotonic() + MIN_MOVE_TIME)
+            self.pondering = False
+            self.ponderhit_event.set()
+
+    def search(self, limits):
+        """
+        Iterative deepening search. Runs on the search thread and sends 'bestmove' when finished.
+        """
+        board = self.board
+        max_depth = limits.get('depth', 100)
+        max_nodes = limits.get('nodes')
+        start_time = time.monotonic()
+
+        legal_moves = list(board.legal_moves)
+        best_pv = legal_moves[:1] # always have a move to play, even if the first iteration doesn't finish
+
+        for depth in range(1, max_depth + 1):
+            try:
+                evaluation, pv = self.minimax(board, depth, -float('inf'), float('inf'), max_nodes, best_pv)
+            except SearchStopped:
+                break
+
+            if pv: # i.e the position isn't already checkmate/stalemate
+                best_pv = pv
+
+            # Report evaluations from the side to move's point of view, in centipawns or moves to mate
+            score = evaluation if board.turn == chess.WHITE else -evaluation
+            if abs(score) >= MATE_EVAL:
+                plies_to_mate = depth - (abs(score) - MATE_EVAL)
+                score = f'mate {(plies_to_mate + 1) // 2 if score > 0 else -(plies_to_mate // 2)}'
+            else:
+                score = f'cp {int(100 * score)}'
+            elapsed = int(1000 * (time.monotonic() - start_time))
+            self.send(f'info depth {depth} score {score} nodes {self.nodes} time {elapsed} '
+                      f'pv {" ".join(move.uci() for move in best_pv)}')
+
+            # A forced mate won't change with more depth
+            if abs(evaluation) >= MATE_EVAL or len(legal_moves) <= 1:
+                break
+
+        # While pondering, bestmove must not be sent until 'ponderhit' or 'stop'. With 'go infinite', only 'stop' will do.
+        if self.pondering:
+            self.ponderhit_event.wait()
+        if self.infinite:
+            self.stop_event.wait()
+
+        if not best_pv:
+            self.send('bestmove 0000')
+        elif len(best_pv) > 1:
+            self.send(f'bestmove {best_pv[0].uci()} ponder {best_pv[1].uci()}')
+        else:
+            self.send(f'bestmove {best_pv[0].uci()}')
+
+    def check_stop(self, max_nodes):
+        """Raises SearchStopped if the search has been told to stop or has used up its time or nodes"""
+        if self.stop_event.is_set():
+            raise SearchStopped
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchStopped
+        if max_nodes is not None and self.nodes >= max_nodes:
+            raise SearchStopped
+
+    def evaluate(self, board):
+        """Scores a position with the model, encoded by features.to_arrays like the batched searches in data_generator"""
+        import torch # imported here, as it is slow to import
+        boards = features.to_arrays([board], out=self.leaf_buffer)
+        return float(self.model(torch.from_numpy(boards))[0])
+
+    def minimax(self, board, depth, alpha, beta, max_nodes, previous_pv):
+        """
+        Alpha-beta minimax to a depth in plies. White maximises the evaluation and black minimises it.
+
+        args:
+            board: the TensorBoard to search. Moves are pushed and popped, so it is left unchanged.
+            depth: plies left to search
+            alpha, beta: the alpha-beta window
+            max_nodes: the node limit of the search, or None
+            previous_pv: the best line from the previous iteration. Its first move is searched first.
+        returns:
+            evaluation, pv: the minimax evaluation and the line of moves leading to it
+        """
+        self.check_stop(max_nodes)
+        self.nodes += 1
+
+        outcome = board.outcome()
+        if outcome is not None:
+            if outcome.winner is None: # i.e a draw
+                return 0, []
+            # Prefer quicker mates by adding the remaining depth
+            return (MATE_EVAL + depth if outcome.winner == chess.WHITE else -MATE_EVAL - depth), []
+        if depth == 0:
+            return self.evaluate(board), []
+
+        # Search the previous best move first, which makes alpha-beta cutoffs much more likely
+        moves = list(board.legal_moves)
+        if previous_pv and previous_pv[0] in moves:
+            moves.remove(previous_pv[0])
+            moves.insert(0, previous_pv[0])
+
+        maximising = board.turn == chess.WHITE
+        best_eval = None
+        best_pv = []
+        for i, move in enumerate(moves):
+            board.push(move)
+            try:
+                evaluation, pv = self.minimax(board, depth - 1, alpha, beta, max_nodes,
+                                              previous_pv[1:] if i == 0 else [])
+            finally:
+                board.pop() # keep the board consistent even if the search is stopped
+
+            if best_eval is None or (evaluation > best_eval if maximising else evaluation < best_eval):
+                best_eval = evaluation
+                best_pv = [move] + pv
+
+            if maximising:
+                alpha = max(alpha, evaluation)
+            else:
+                beta = min(beta, evaluation)
+            if alpha >= beta:
+                break
+
+        return best_eval, best_pv
+
+if __name__ == '__main__':
+    import model_builder # imported here, as it is slow to import
+    engine = UCIEngine(model_builder.BaseModel(variables.material_values))
+    engine.loop()
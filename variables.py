@@ -1,4 +1,3 @@
-import torch
 import chess
 
 # White:            Black       
@@ -76,4 +75,22 @@ base_board = [4., 2., 3., 5., 6., 3., 2., 4., # Piece data
               0., 0., 0., 0., 0., 0., 0., 0.,
               -1., -1., -1., -1., -1., -1., -1., -1.,
               -4., -2., -3., -5., -6., -3., -2., -4.,
-              1., -1.] # Extra data - turn, en-passant square
\ No newline at end of file
+              1., -1.] # Extra data - turn, en-passant square
+
+# Short opening lines (in uci format) used to start games from varied positions
+openings = [[],
+            ['e2e4', 'e7e5'],
+            ['e2e4', 'c7c5'],
+            ['e2e4', 'e7e6'],
+            ['e2e4', 'c7c6'],
+            ['d2d4', 'd7d5'],
+            ['d2d4', 'g8f6', 'c2c4', 'e7e6'],
+            ['d2d4', 'g8f6', 'c2c4', 'g7g6'],
+            ['c2c4', 'e7e5'],
+            ['g1f3', 'd7d5'],
+            ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5'],
+            ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1c4'],
+            ['d2d4', 'd7d5', 'c2c4', 'c7c6'],
+            ['e2e4', 'd7d6', 'd2d4', 'g8f6'],
+            ['b1c3', 'd7d5'],
+            ['g2g3', 'e7e5']]